@@ -7,21 +7,85 @@ using separators like:
 
 Removes unit tests by omitting everything from the first occurrence of
 '#[cfg(test)]' to the end of the file.
+
+Files are copied byte for byte, so CRLF line endings are kept as-is rather
+than normalised to LF.
 """
 
 import argparse
+import io
+import mmap
+import os
+import shutil
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-
-
-def strip_tests(file_path: Path) -> str:
-    """Return file contents up to (but not including) #[cfg(test)]."""
-    lines = []
-    with file_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip().startswith("#[cfg(test)]"):
-                break
-            lines.append(line)
-    return "".join(lines)
+from typing import Optional
+
+TEST_MARKER = b"#[cfg(test)]"
+
+SEP = b"// =============================================\n"
+
+OUT_BUFFER = 1 << 20  # 1 MiB output buffer for source.txt
+
+READ_WORKERS = min(8, os.cpu_count() or 1)
+READ_AHEAD = 4 * READ_WORKERS  # files scanned ahead of the writer
+
+
+def find_test_marker(buf) -> int:
+    """Return the offset of the first line starting with #[cfg(test)], or -1."""
+    i = buf.find(TEST_MARKER)
+    while i >= 0:
+        line_start = buf.rfind(b"\n", 0, i) + 1
+        # Only count the marker when nothing but whitespace precedes it on its line
+        if not buf[line_start:i].strip():
+            return line_start
+        i = buf.find(TEST_MARKER, i + 1)
+    return -1
+
+
+def read_without_tests(file_path: Path) -> Optional[bytes]:
+    """Return file contents up to (but not including) #[cfg(test)], or None if there are no tests."""
+    with file_path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            cut = find_test_marker(mm)
+            return mm[:cut] if cut >= 0 else None
+
+
+def copy_file(file_path: Path, out) -> None:
+    """Append the whole file to out without pulling it into Python."""
+    with file_path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        out.flush()
+        offset = 0
+        # Only Linux sendfile(2) accepts a regular file as the destination
+        if sys.platform.startswith("linux"):
+            try:
+                while offset < size:
+                    sent = os.sendfile(out.fileno(), f.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                pass  # e.g. EINVAL on filesystems without splice support
+        f.seek(offset)
+        shutil.copyfileobj(f, out, OUT_BUFFER)
+
+
+def iter_rs_files(root: Path):
+    """Yield paths of all .rs files under root, using cached DirEntry stats."""
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".rs") and entry.is_file():
+                    yield entry.path
 
 
 def concat_rust_sources(root: Path) -> None:
@@ -31,25 +95,39 @@ def concat_rust_sources(root: Path) -> None:
 
     # Find and sort all .rs files
     rs_files = sorted(
-        (p for p in root.rglob("*.rs") if p.is_file()),
-        key=lambda p: p.relative_to(root).as_posix(),
+        Path(p).relative_to(root).as_posix() for p in iter_rs_files(root)
     )
 
-    with out_file.open("w", encoding="utf-8") as out:
-        for path in rs_files:
-            rel = path.relative_to(root).as_posix()
-            display_path = f"{dirname}/{rel}"
+    header_prefix = SEP + b"// " + dirname.encode("utf-8") + b"/"
+    header_suffix = b"\n" + SEP + b"\n"
 
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+    fd = os.open(out_file, flags, 0o644)
+    raw = io.FileIO(fd, "w", closefd=True)
+    with io.BufferedWriter(raw, buffer_size=OUT_BUFFER) as out:
+
+        def write_one(rel, future):
             # Write separator header
-            out.write("// =============================================\n")
-            out.write(f"// {display_path}\n")
-            out.write("// =============================================\n\n")
+            out.write(header_prefix + rel.encode("utf-8") + header_suffix)
 
             # Write file content without tests
-            contents = strip_tests(path)
-            out.write(contents)
-
-            out.write("\n\n")
+            contents = future.result()
+            if contents is None:
+                copy_file(root / rel, out)
+            else:
+                out.write(contents)
+
+            out.write(b"\n\n")
+
+        # Scan files on worker threads; write them here in sorted order
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as ex:
+            pending = deque()
+            for rel in rs_files:
+                pending.append((rel, ex.submit(read_without_tests, root / rel)))
+                if len(pending) >= READ_AHEAD:
+                    write_one(*pending.popleft())
+            while pending:
+                write_one(*pending.popleft())
 
     print(f"Done. Processed {len(rs_files)} files → {out_file}")
 
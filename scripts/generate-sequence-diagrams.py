@@ -3,28 +3,35 @@
 import os
 import sys
 import json
+from operator import itemgetter
+
+try:
+    import orjson
+    load_json = orjson.loads
+except ImportError:
+    load_json = json.loads
+
+def collect_model(model, element_map, relationship_map):
+    stack = [*model.get("softwareSystems", ()), *model.get("people", ())]
+    while stack:
+        element = stack.pop()
+        eid = element.get("id")
+        name = element.get("name")
+        if eid and name:
+            element_map[eid] = name
+
+        for rel in element.get("relationships", ()):
+            rel_id = rel.get("id")
+            if rel_id:
+                relationship_map[rel_id] = rel
 
-def collect_elements_from_element(element, element_map):
-    eid = element.get("id")
-    name = element.get("name")
-    if eid and name:
-        element_map[eid] = name
-
-    for container in element.get("containers", []):
-        collect_elements_from_element(container, element_map)
-    for component in element.get("components", []):
-        collect_elements_from_element(component, element_map)
-
-def collect_relationships_from_element(element, relationship_map):
-    for rel in element.get("relationships", []):
-        rel_id = rel.get("id")
-        if rel_id:
-            relationship_map[rel_id] = rel
+        stack.extend(element.get("containers", ()))
+        stack.extend(element.get("components", ()))
 
-    for container in element.get("containers", []):
-        collect_relationships_from_element(container, relationship_map)
-    for component in element.get("components", []):
-        collect_relationships_from_element(component, relationship_map)
+def participant_decl(eid, label):
+    if label and label[0].islower():
+        return f"actor \"{label}\" as {eid}\n"
+    return f"participant \"{label}\" as {eid}\n"
 
 def main():
     if len(sys.argv) != 3:
@@ -35,22 +42,18 @@ def main():
     output_dir = sys.argv[2]
     os.makedirs(output_dir, exist_ok=True)
 
-    with open(workspace_json_file) as f:
-        workspace = json.load(f)
+    with open(workspace_json_file, "rb") as f:
+        workspace = load_json(f.read())
 
-    # Build element ID -> Name map
+    # Build element ID -> Name and relationship ID -> Relationship object maps
     element_id_to_name = {}
-    for ss in workspace.get("model", {}).get("softwareSystems", []):
-        collect_elements_from_element(ss, element_id_to_name)
-    for person in workspace.get("model", {}).get("people", []):
-        collect_elements_from_element(person, element_id_to_name)
-
-    # Build relationship ID -> Relationship object map
     relationship_map = {}
-    for ss in workspace.get("model", {}).get("softwareSystems", []):
-        collect_relationships_from_element(ss, relationship_map)
-    for person in workspace.get("model", {}).get("people", []):
-        collect_relationships_from_element(person, relationship_map)
+    collect_model(workspace.get("model", {}), element_id_to_name, relationship_map)
+
+    # Participant declarations don't depend on the view, so build them once
+    participant_decls = {
+        eid: participant_decl(eid, name) for eid, name in element_id_to_name.items()
+    }
 
     # Process dynamic views
     dynamic_views = workspace.get("views", {}).get("dynamicViews", [])
@@ -67,64 +70,55 @@ def main():
 
         print(f"Generating sequence diagram for: {key}")
 
+        # Resolve each message once: (order, src, dst, desc, is_response)
+        messages = []
+        for rel in view.get("relationships", []):
+            model_rel = relationship_map.get(rel.get("id"))
+            if not model_rel:
+                continue
+            messages.append((
+                int(rel.get("order", "0")),
+                model_rel.get("sourceId"),
+                model_rel.get("destinationId"),
+                rel.get("description", "").replace("\n", " "),
+                rel.get("response", False),
+            ))
+        messages.sort(key=itemgetter(0))
+
         # Build participants in order of first appearance in messages
         ordered_participants = []
         seen = set()
-
-        relationships_in_order = sorted(
-            view.get("relationships", []),
-            key=lambda r: int(r.get("order", "0"))
-        )
-        for rel in relationships_in_order:
-            rel_id = rel.get("id")
-            if not rel_id:
-                continue
-            model_rel = relationship_map.get(rel_id)
-            if not model_rel:
-                continue
-            src = model_rel.get("sourceId")
-            dst = model_rel.get("destinationId")
-            for p in [src, dst]:
+        for _, src, dst, _, _ in messages:
+            for p in (src, dst):
                 if p and p not in seen:
                     seen.add(p)
                     ordered_participants.append(p)
 
         # NEW: Prefix output file with UML-
         output_path = os.path.join(output_dir, f"UML-{key}.puml")
+        parts = ["@startuml\n", f"title {name}\n\n"]
+
+        # Participants in order of appearance
+        parts.extend(
+            participant_decls.get(p) or participant_decl(p, p)
+            for p in ordered_participants
+        )
+
+        parts.append("\n")
+
+        # Messages in order
+        for _, src, dst, desc, is_response in messages:
+            if not src or not dst:
+                continue
+            if is_response:
+                parts.append(f"{dst} -> {src} : {desc}\n")
+            else:
+                parts.append(f"{src} -> {dst} : {desc}\n")
+
+        parts.append("@enduml\n")
+
         with open(output_path, "w") as out:
-            out.write("@startuml\n")
-            out.write(f"title {name}\n\n")
-
-            # Write participants in order of appearance
-            for p in ordered_participants:
-                label = element_id_to_name.get(p, p)
-                if label and label[0].islower():
-                    out.write(f"actor \"{label}\" as {p}\n")
-                else:
-                    out.write(f"participant \"{label}\" as {p}\n")
-
-            out.write("\n")
-
-            # Messages in order
-            for rel in relationships_in_order:
-                rel_id = rel.get("id")
-                if not rel_id:
-                    continue
-                model_rel = relationship_map.get(rel_id)
-                if not model_rel:
-                    continue
-                src = model_rel.get("sourceId")
-                dst = model_rel.get("destinationId")
-                if not src or not dst:
-                    continue
-                desc = rel.get("description", "").replace("\n", " ")
-                is_response = rel.get("response", False)
-                if is_response:
-                    out.write(f"{dst} -> {src} : {desc}\n")
-                else:
-                    out.write(f"{src} -> {dst} : {desc}\n")
-
-            out.write("@enduml\n")
+            out.write("".join(parts))
 
         print(f"✅ Wrote {output_path}")
 
@@ -0,0 +1,133 @@
+"""
+Shared GitHub GraphQL transport for the project scripts in this directory.
+- One keep-alive HTTPS connection per thread to api.github.com.
+- Auth: GH_TOKEN / GITHUB_TOKEN, else the GitHub CLI token (gh auth token).
+- Retries rate-limited requests following GitHub's guidance.
+- iter_items() pages through ProjectV2 items with one page of prefetch.
+- cached() memoizes slow-changing lookups on disk.
+"""
+import http.client, json, os, subprocess, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+def sh(cmd, input=None, check=True):
+    res = subprocess.run(cmd, input=input, capture_output=True, text=True)
+    if check and res.returncode != 0:
+        raise RuntimeError(f"Command failed: {' '.join(cmd)}\nSTDERR:\n{res.stderr}")
+    return res.stdout
+
+def github_token():
+    token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if not token:
+        token = sh(["gh","auth","token"]).strip()
+    return token
+
+_local = threading.local()  # one keep-alive connection per calling thread
+_headers = None
+_headers_lock = threading.Lock()
+MAX_RETRIES = 3
+SECONDARY_LIMIT_WAIT = 60  # GitHub: wait at least a minute when no retry header is sent
+
+def auth_headers():
+    global _headers
+    with _headers_lock:
+        if _headers is None:
+            _headers = {
+                "Authorization": f"bearer {github_token()}",
+                "Accept": "application/vnd.github+json",
+                "Content-Type": "application/json",
+                "User-Agent": "whisper-cms-scripts",
+            }
+    return _headers
+
+def post(body):
+    conn = getattr(_local, "conn", None)
+    reused = conn is not None
+    if not reused:
+        conn = _local.conn = http.client.HTTPSConnection("api.github.com", timeout=30)
+    sent = False
+    try:
+        conn.request("POST", "/graphql", body, auth_headers())
+        sent = True
+        res = conn.getresponse()
+        return res, res.read()
+    except Exception as e:
+        conn.close()
+        _local.conn = None
+        # Only a keep-alive connection the server had already closed is safe to
+        # resend on; timeouts or resets after sending may have reached GitHub.
+        stale = isinstance(e, http.client.RemoteDisconnected) or (
+            not sent and isinstance(e, (BrokenPipeError, ConnectionResetError)))
+        if not (reused and stale):
+            raise
+    return post(body)
+
+def rate_limit_delay(res, payload, attempt):
+    """Seconds to wait before retrying a rate-limited response, or None if it wasn't limited."""
+    if res.status == 200:
+        # primary GraphQL limit: HTTP 200 with errors[].type == "RATE_LIMITED"
+        if b'"RATE_LIMITED"' not in payload:
+            return None
+        errors = json.loads(payload).get("errors") or ()
+        if not any(e.get("type") == "RATE_LIMITED" for e in errors):
+            return None
+    elif not (res.status == 429 or (res.status == 403 and b"rate limit" in payload.lower())):
+        return None
+    retry_after = res.getheader("Retry-After")
+    if retry_after:
+        return float(retry_after)
+    reset = res.getheader("x-ratelimit-reset")
+    if res.getheader("x-ratelimit-remaining") == "0" and reset:
+        return max(0.0, float(reset) - time.time()) + 1
+    return SECONDARY_LIMIT_WAIT * 2 ** attempt
+
+def post_graphql(query, vars):
+    """POST one GraphQL request over this thread's connection; return the raw response."""
+    body = json.dumps({"query": query, "variables": vars})
+    for attempt in range(MAX_RETRIES + 1):
+        res, payload = post(body)
+        delay = rate_limit_delay(res, payload, attempt)
+        if delay is None or attempt == MAX_RETRIES:
+            break
+        time.sleep(delay)
+    if res.status != 200:
+        raise RuntimeError(f"GraphQL request failed: HTTP {res.status}\n{payload.decode(errors='replace')}")
+    return json.loads(payload)
+
+def gql(query, **vars):
+    data = post_graphql(query, vars)
+    if data.get("errors"):
+        raise RuntimeError(f"GraphQL errors: {json.dumps(data['errors'])}")
+    return data
+
+def iter_items(project_id, query):
+    """Yield project item nodes, requesting the next page as soon as its cursor is known."""
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        fut = ex.submit(gql, query, id=project_id, after=None)
+        while fut is not None:
+            items = fut.result()["data"]["node"]["items"]
+            info = items["pageInfo"]
+            fut = ex.submit(gql, query, id=project_id, after=info["endCursor"]) if info["hasNextPage"] else None
+            yield from items["nodes"]
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "whisper-cms"
+CACHE_TTL = 3600  # seconds; project and field lookups rarely change
+
+def cached(name, fetch, use_cache=True):
+    """Return fetch() memoized as JSON in CACHE_DIR/<name>.json for CACHE_TTL seconds."""
+    path = CACHE_DIR / f"{name}.json"
+    if use_cache:
+        try:
+            if time.time() - path.stat().st_mtime < CACHE_TTL:
+                return json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            pass
+    value = fetch()
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(value), encoding="utf-8")
+        tmp.replace(path)
+    except OSError:
+        pass  # caching is best effort
+    return value
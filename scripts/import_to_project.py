@@ -2,7 +2,8 @@
 """
 Import CSV rows as GitHub Projects (v2) draft items.
 - Idempotent: if a draft with the same Title already exists, it updates fields instead of creating a duplicate.
-- Requires GitHub CLI: gh auth login && gh auth refresh -s project,repo
+- Talks to the GraphQL API directly over one keep-alive HTTPS connection.
+- Auth: GH_TOKEN / GITHUB_TOKEN, else the GitHub CLI token (gh auth login && gh auth refresh -s project,repo)
 
 CSV columns required: Title, Body, Epic, MVP, Priority, Status
 Project fields expected:
@@ -20,22 +21,25 @@ Then actually import:
 Optionally update Body for existing drafts:
   python3 import_to_projects.py --owner CoderByBlood --project-number 2 --csv whispercms_project_backlog.csv --update-body
 """
-import argparse, csv, json, subprocess, sys, time
+import argparse, csv, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from gh_graphql import cached, gql, iter_items, post_graphql
+
 # ----------------- utils -----------------
-def sh(cmd, input=None, check=True):
-    res = subprocess.run(cmd, input=input, capture_output=True, text=True)
-    if check and res.returncode != 0:
-        raise RuntimeError(f"Command failed: {' '.join(cmd)}\nSTDERR:\n{res.stderr}")
-    return res.stdout
-
-def gql(query, **vars):
-    args = []
-    for k, v in vars.items():
-        is_int = isinstance(v, int) or (isinstance(v, str) and v.isdigit())
-        args += (["-F", f"{k}={v}"] if is_int else ["-f", f"{k}={v}"])
-    return sh(["gh","api","graphql", *args, "-f", f"query={query}"])
+_pace_lock = threading.Lock()
+_next_slot = 0.0
+
+def pace(interval):
+    """Space calls at least `interval` seconds apart across all threads."""
+    global _next_slot
+    with _pace_lock:
+        now = time.monotonic()
+        slot = max(now, _next_slot)
+        _next_slot = slot + interval
+    if slot > now:
+        time.sleep(slot - now)
 
 # ----------------- lookups -----------------
 def get_project(owner, number):
@@ -47,13 +51,13 @@ def get_project(owner, number):
     query($owner:String!, $number:Int!) {
       user(login:$owner) { projectV2(number:$number) { id title number } }
     }"""
-    # try org
-    data = json.loads(gql(q_org, owner=owner, number=number))
+    # try org (a user login resolves to null with an error, so don't raise)
+    data = post_graphql(q_org, {"owner": owner, "number": number})
     proj = (data.get("data") or {}).get("organization", {}) or {}
     proj = proj.get("projectV2")
     # fallback to user
     if not proj:
-        data = json.loads(gql(q_user, owner=owner, number=number))
+        data = post_graphql(q_user, {"owner": owner, "number": number})
         proj = (data.get("data") or {}).get("user", {}) or {}
         proj = proj.get("projectV2")
     if not proj:
@@ -76,86 +80,85 @@ def get_fields(project_id):
         }
       }
     }"""
-    data = json.loads(gql(q, id=project_id))
+    data = gql(q, id=project_id)
     nodes = data["data"]["node"]["fields"]["nodes"]
     return { n["name"]: n for n in nodes if "name" in n }
 
 def list_existing_draft_items_by_title(project_id):
-    """Return {title: item_id} for DraftIssue items."""
-    def page(after=None):
-        q = """
-        query($id:ID!, $after:String) {
-          node(id:$id) {
-            ... on ProjectV2 {
-              items(first:100, after:$after) {
-                nodes {
-                  id
-                  type
-                  content {
-                    __typename
-                    ... on DraftIssue { title }
-                    ... on Issue { title }
-                    ... on PullRequest { title }
-                  }
-                }
-                pageInfo { hasNextPage endCursor }
+    """Return {title: (item_id, draft_issue_id)} for DraftIssue items."""
+    q = """
+    query($id:ID!, $after:String) {
+      node(id:$id) {
+        ... on ProjectV2 {
+          items(first:100, after:$after) {
+            nodes {
+              id
+              content {
+                __typename
+                ... on DraftIssue { id title }
               }
             }
+            pageInfo { hasNextPage endCursor }
           }
-        }"""
-        if after is None:
-            return json.loads(gql(q, id=project_id))
-        else:
-            return json.loads(gql(q, id=project_id, after=after))
-
+        }
+      }
+    }"""
     out = {}
-    after = None
-    while True:
-        data = page(after)
-        items = data["data"]["node"]["items"]
-        for n in items["nodes"]:
-            c = n.get("content") or {}
-            if c.get("__typename") == "DraftIssue":
-                t = (c.get("title") or "").strip()
-                if t and t not in out:
-                    out[t] = n["id"]
-        if not items["pageInfo"]["hasNextPage"]:
-            break
-        after = items["pageInfo"]["endCursor"]
+    for n in iter_items(project_id, q):
+        c = n.get("content") or {}
+        if c.get("__typename") == "DraftIssue":
+            t = (c.get("title") or "").strip()
+            if t and t not in out:
+                out[t] = (n["id"], c["id"])
     return out
 
 # ----------------- item ops -----------------
-def item_create(owner, project_number, title, body):
-    out = sh([
-        "gh","project","item-create",str(project_number),
-        "--owner",owner,"--title",title,"--body",body,"--format","json"
-    ])
-    return json.loads(out)["id"]
-
-def item_edit_body(item_id, project_id, body):
-    sh(["gh","project","item-edit","--id",item_id,"--project-id",project_id,"--body",body])
+def item_create(project_id, title, body):
+    m = """
+    mutation($projectId:ID!, $title:String!, $body:String) {
+      addProjectV2DraftIssue(input:{projectId:$projectId, title:$title, body:$body}) { projectItem { id } }
+    }"""
+    data = gql(m, projectId=project_id, title=title, body=body)
+    return data["data"]["addProjectV2DraftIssue"]["projectItem"]["id"]
 
-def set_text(item_id, project_id, field_id, text):
-    sh(["gh","project","item-edit","--id",item_id,"--project-id",project_id,
-        "--field-id",field_id,"--text",text])
+def item_edit_body(draft_issue_id, body):
+    m = """
+    mutation($draftIssueId:ID!, $body:String!) {
+      updateProjectV2DraftIssue(input:{draftIssueId:$draftIssueId, body:$body}) { draftIssue { id } }
+    }"""
+    gql(m, draftIssueId=draft_issue_id, body=body)
 
-def set_single_select(item_id, project_id, field_node, value):
+def option_index(field_node):
+    """Return ({name: option_id}, {lowercased name: name}) for a SINGLE_SELECT field."""
     opts = { o["name"]: o["id"] for o in field_node.get("options", []) }
+    return opts, {k.lower():k for k in opts}
+
+def option_id(field_name, index, value):
+    opts, lower = index
     if not opts:
-        raise RuntimeError(f"Field '{field_node['name']}' has no options.")
-    option_name = value if value in opts else {k.lower():k for k in opts}.get(value.lower())
+        raise RuntimeError(f"Field '{field_name}' has no options.")
+    option_name = value if value in opts else lower.get(value.lower())
     if not option_name:
         raise RuntimeError(
-            f"Value '{value}' not valid for field '{field_node['name']}'. Options: {list(opts.keys())}"
+            f"Value '{value}' not valid for field '{field_name}'. Options: {list(opts.keys())}"
+        )
+    return opts[option_name]
+
+def set_fields(item_id, project_id, updates):
+    """Apply [(field_id, kind, value)] in one aliased mutation; kind is 'text' or 'singleSelectOptionId'."""
+    decls = ["$projectId:ID!", "$itemId:ID!"]
+    ops = []
+    vars = {"projectId": project_id, "itemId": item_id}
+    for k, (field_id, kind, value) in enumerate(updates):
+        decls += [f"$f{k}:ID!", f"$v{k}:String!"]
+        ops.append(
+            f"u{k}: updateProjectV2ItemFieldValue(input:{{projectId:$projectId, itemId:$itemId, "
+            f"fieldId:$f{k}, value:{{{kind}:$v{k}}}}}) {{ clientMutationId }}"
         )
-    option_id = opts[option_name]
-    sh([
-        "gh","project","item-edit",
-        "--id", item_id,
-        "--project-id", project_id,
-        "--field-id", field_node["id"],
-        "--single-select-option-id", option_id
-    ])
+        vars[f"f{k}"] = field_id
+        vars[f"v{k}"] = value
+    m = "mutation(" + ", ".join(decls) + ") {\n  " + "\n  ".join(ops) + "\n}"
+    gql(m, **vars)
 
 # ----------------- main -----------------
 def main():
@@ -163,15 +166,23 @@ def main():
     ap.add_argument("--owner", required=True, help="Org or user owner (e.g., CoderByBlood)")
     ap.add_argument("--project-number", required=True, type=int)
     ap.add_argument("--csv", required=True, type=Path)
-    ap.add_argument("--sleep", type=float, default=0.25, help="Delay between items (API friendly)")
+    # a new row costs two mutations; 1.5s keeps under GitHub's 80 content-creating requests/minute
+    ap.add_argument("--sleep", type=float, default=1.5, help="Minimum delay between item starts across workers (API friendly)")
+    ap.add_argument("--workers", type=int, default=4, help="Rows imported concurrently")
     ap.add_argument("--dry-run", action="store_true")
     ap.add_argument("--update-body", action="store_true", help="Update Body when Title already exists")
+    ap.add_argument("--no-cache", action="store_true", help="Re-fetch project and field lookups instead of using the 1h disk cache")
     args = ap.parse_args()
 
-    project_id, proj_title = get_project(args.owner, args.project_number)
+    use_cache = not args.no_cache
+    project_id, proj_title = cached(
+        f"project-{args.owner}-{args.project_number}",
+        lambda: get_project(args.owner, args.project_number),
+        use_cache,
+    )
     print(f"Project: {proj_title} (id={project_id})")
 
-    fields = get_fields(project_id)
+    fields = cached(f"fields-{project_id}", lambda: get_fields(project_id), use_cache)
     needed = ["Epic","MVP","Priority","Status"]
     missing = [n for n in needed if n not in fields]
     if missing:
@@ -183,52 +194,72 @@ def main():
     for name in ["MVP","Priority","Status"]:
         if fields[name]["dataType"] != "SINGLE_SELECT":
             print(f"WARNING: Field '{name}' should be SINGLE_SELECT.")
+    options = {name: option_index(fields[name]) for name in ["MVP","Priority","Status"]}
 
     existing = list_existing_draft_items_by_title(project_id)
     print(f"Found {len(existing)} existing draft items by Title.")
 
-    created = updated = 0
+    columns = ["Title","Body","Epic","MVP","Priority","Status"]
     with args.csv.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for i, r in enumerate(reader, start=2):  # start=2 accounts for CSV header row
-            title = (r.get("Title") or "").strip()
-            body = (r.get("Body") or "").strip()
-            epic = (r.get("Epic") or "").strip()
-            mvp = (r.get("MVP") or "").strip()
-            priority = (r.get("Priority") or "").strip()
-            status = (r.get("Status") or "").strip()
-            if not title:
-                print(f"Row {i}: Skipping empty Title")
+        reader = csv.reader(f)
+        header = next(reader, [])
+        missing = [c for c in columns if c not in header]
+        if missing:
+            print(f"ERROR: Missing columns in CSV: {missing}")
+            sys.exit(1)
+        cols = [header.index(c) for c in columns]
+        width = max(cols) + 1
+        rows = []
+        for i, row in enumerate(reader, start=2):  # start=2 accounts for CSV header row
+            if not row:
                 continue
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            rows.append((i, row))
 
-            upserting = "Updating" if title in existing else "Creating"
-            print(f"• {upserting}: {title}")
-            if args.dry_run:
-                print(f"  (dry-run) Epic='{epic}', MVP='{mvp}', Priority='{priority}', Status='{status}'")
-                continue
+    def process_row(row):
+        """Upsert one CSV row; return (outcome, log lines) so output stays in CSV order."""
+        i, r = row
+        title, body, epic, mvp, priority, status = (r[j].strip() for j in cols)
+        if not title:
+            return None, [f"Row {i}: Skipping empty Title"]
+
+        upserting = "Updating" if title in existing else "Creating"
+        log = [f"• {upserting}: {title}"]
+        if args.dry_run:
+            log.append(f"  (dry-run) Epic='{epic}', MVP='{mvp}', Priority='{priority}', Status='{status}'")
+            return None, log
 
-            try:
-                if title in existing:
-                    item_id = existing[title]
-                    # update fields
-                    set_text(item_id, project_id, fields["Epic"]["id"], epic)
-                    set_single_select(item_id, project_id, fields["MVP"], mvp)
-                    set_single_select(item_id, project_id, fields["Priority"], priority)
-                    set_single_select(item_id, project_id, fields["Status"], status)
-                    if args.update_body and body:
-                        item_edit_body(item_id, project_id, body)
-                    updated += 1
-                else:
-                    # create then set fields
-                    item_id = item_create(args.owner, args.project_number, title, body)
-                    set_text(item_id, project_id, fields["Epic"]["id"], epic)
-                    set_single_select(item_id, project_id, fields["MVP"], mvp)
-                    set_single_select(item_id, project_id, fields["Priority"], priority)
-                    set_single_select(item_id, project_id, fields["Status"], status)
-                    created += 1
-                time.sleep(args.sleep)
-            except Exception as e:
-                print(f"  Row {i} ERROR: {e}")
+        try:
+            updates = [
+                (fields["Epic"]["id"], "text", epic),
+                (fields["MVP"]["id"], "singleSelectOptionId", option_id("MVP", options["MVP"], mvp)),
+                (fields["Priority"]["id"], "singleSelectOptionId", option_id("Priority", options["Priority"], priority)),
+                (fields["Status"]["id"], "singleSelectOptionId", option_id("Status", options["Status"], status)),
+            ]
+            pace(args.sleep)
+            if title in existing:
+                item_id, draft_issue_id = existing[title]
+                # update fields
+                set_fields(item_id, project_id, updates)
+                if args.update_body and body:
+                    item_edit_body(draft_issue_id, body)
+                return "updated", log
+            else:
+                # create then set fields
+                item_id = item_create(project_id, title, body)
+                set_fields(item_id, project_id, updates)
+                return "created", log
+        except Exception as e:
+            log.append(f"  Row {i} ERROR: {e}")
+            return None, log
+
+    created = updated = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as ex:
+        for outcome, log in ex.map(process_row, rows):
+            print("\n".join(log))
+            created += outcome == "created"
+            updated += outcome == "updated"
 
     print(f"Done. Created {created}, Updated {updated} items.")
 
@@ -3,6 +3,7 @@
 Delete GitHub Project draft items whose Title appears in a CSV.
 - Safe by default: dry-run prints how many would be deleted.
 - Use --delete to actually remove.
+- Auth: GH_TOKEN / GITHUB_TOKEN, else the GitHub CLI token (gh auth login && gh auth refresh -s project)
 
 CSV must have a "Title" column.
 
@@ -12,34 +13,26 @@ Usage (preview only):
 Delete them:
   python3 purge_project_drafts_by_titles.py --owner CoderByBlood --project-number 2 --csv whispercms_project_backlog.csv --delete
 """
-import argparse, csv, json, subprocess, sys
+import argparse, csv
 
-def sh(cmd, check=True):
-    res = subprocess.run(cmd, capture_output=True, text=True)
-    if check and res.returncode != 0:
-        raise RuntimeError(f"Command failed: {' '.join(cmd)}\nSTDERR:\n{res.stderr}")
-    return res.stdout
-
-def gql(query, **vars):
-    args = []
-    for k, v in vars.items():
-        is_int = isinstance(v, int) or (isinstance(v, str) and v.isdigit())
-        args += (["-F", f"{k}={v}"] if is_int else ["-f", f"{k}={v}"])
-    return sh(["gh","api","graphql", *args, "-f", f"query={query}"])
+from gh_graphql import cached, gql, iter_items, post_graphql
 
 def get_project(owner, number):
-    q_org = """
+    # ask both scopes at once; the one that doesn't match resolves to null with an error
+    q = """
     query($owner:String!, $number:Int!) {
       organization(login:$owner) { projectV2(number:$number) { id title number } }
+      user(login:$owner) { projectV2(number:$number) { id title number } }
     }"""
-    data = json.loads(gql(q_org, owner=owner, number=number))
-    proj = (data.get("data") or {}).get("organization", {}) or {}
-    proj = proj.get("projectV2")
+    data = post_graphql(q, {"owner": owner, "number": number}).get("data") or {}
+    proj = ((data.get("organization") or {}).get("projectV2")
+            or (data.get("user") or {}).get("projectV2"))
     if not proj:
         raise SystemExit("Could not find project. Check owner/number and permissions.")
     return proj["id"], proj["title"]
 
-def list_items(project_id):
+def iter_matching_draft_ids(project_id, wanted):
+    """Yield (item_id, title) for draft items whose title is in wanted, filtering while paging."""
     q = """
     query($id:ID!, $after:String) {
       node(id:$id) {
@@ -47,12 +40,8 @@ def list_items(project_id):
           items(first:100, after:$after) {
             nodes {
               id
-              type
               content {
-                __typename
                 ... on DraftIssue { title }
-                ... on Issue { title url }
-                ... on PullRequest { title url }
               }
             }
             pageInfo { hasNextPage endCursor }
@@ -60,33 +49,25 @@ def list_items(project_id):
         }
       }
     }"""
-    items = []
-    after = None
-    while True:
-        if after is None:
-            data = json.loads(gql(q, id=project_id))
-        else:
-            data = json.loads(gql(q, id=project_id, after=after))
-        page = data["data"]["node"]["items"]
-        for n in page["nodes"]:
-            c = n.get("content") or {}
-            t = None
-            if c.get("__typename") == "DraftIssue":
-                t = c.get("title")
-            elif c.get("__typename") in ("Issue","PullRequest"):
-                t = c.get("title")
-            items.append({"id": n["id"], "type": n["type"], "title": t})
-        if not page["pageInfo"]["hasNextPage"]:
-            break
-        after = page["pageInfo"]["endCursor"]
-    return items
+    # only DraftIssue content selects a title, so other item types never match
+    for n in iter_items(project_id, q):
+        t = (n.get("content") or {}).get("title")
+        if t in wanted:
+            yield n["id"], t
 
-def delete_item(project_id, item_id):
-    m = """
-    mutation($projectId:ID!, $itemId:ID!) {
-      deleteProjectV2Item(input:{projectId:$projectId, itemId:$itemId}) { deletedItemId }
-    }"""
-    gql(m, projectId=project_id, itemId=item_id)
+DELETE_BATCH = 20
+
+def delete_items(project_id, item_ids):
+    """Delete item_ids with one aliased deleteProjectV2Item mutation."""
+    decls = ["$projectId:ID!"]
+    ops = []
+    vars = {"projectId": project_id}
+    for k, item_id in enumerate(item_ids):
+        decls.append(f"$i{k}:ID!")
+        ops.append(f"d{k}: deleteProjectV2Item(input:{{projectId:$projectId, itemId:$i{k}}}) {{ deletedItemId }}")
+        vars[f"i{k}"] = item_id
+    m = "mutation(" + ", ".join(decls) + ") {\n  " + "\n  ".join(ops) + "\n}"
+    gql(m, **vars)
 
 def main():
     ap = argparse.ArgumentParser(description="Delete Project draft items whose Title appears in CSV.")
@@ -95,31 +76,42 @@ def main():
     ap.add_argument("--csv", required=True)
     ap.add_argument("--dry-run", action="store_true")
     ap.add_argument("--delete", action="store_true")
+    ap.add_argument("--no-cache", action="store_true", help="Re-fetch the project lookup instead of using the 1h disk cache")
     args = ap.parse_args()
 
-    project_id, title = get_project(args.owner, args.project_number)
+    project_id, title = cached(
+        f"project-{args.owner}-{args.project_number}",
+        lambda: get_project(args.owner, args.project_number),
+        not args.no_cache,
+    )
     print(f"Project: {title} ({project_id})")
 
     # titles from CSV
     wanted = set()
     with open(args.csv, newline="", encoding="utf-8") as f:
-        for row in csv.DictReader(f):
-            t = (row.get("Title") or "").strip()
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if "Title" not in header:
+            raise SystemExit("CSV must have a \"Title\" column.")
+        col = header.index("Title")
+        for row in reader:
+            t = row[col].strip() if col < len(row) else ""
             if t:
                 wanted.add(t)
 
-    items = list_items(project_id)
-    to_delete = [it for it in items if it["type"] == "DRAFT_ISSUE" and it["title"] in wanted]
+    # every draft with a wanted title, duplicates included, so no early exit
+    to_delete = list(iter_matching_draft_ids(project_id, wanted))
 
     print(f"Found {len(to_delete)} draft items matching CSV titles.")
-    for it in to_delete[:12]:
-        print(f"  - {it['title']} ({it['id']})")
+    for item_id, t in to_delete[:12]:
+        print(f"  - {t} ({item_id})")
     if len(to_delete) > 12:
         print(f"  … and {len(to_delete)-12} more")
 
     if args.delete:
-        for it in to_delete:
-            delete_item(project_id, it["id"])
+        ids = [item_id for item_id, _ in to_delete]
+        for start in range(0, len(ids), DELETE_BATCH):
+            delete_items(project_id, ids[start:start + DELETE_BATCH])
         print(f"Deleted {len(to_delete)} draft items.")
     else:
         print("Dry-run only. Re-run with --delete to actually remove them.")